@@ -35,6 +35,14 @@ resource "aws_iam_role_policy" "lambda_auto_heal_policy" {
         Action = ["sns:Publish"]
         Resource = aws_sns_topic.alerts.arn
       },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:UpdateItem",
+          "dynamodb:DeleteItem"
+        ]
+        Resource = aws_dynamodb_table.auto_heal_cooldown.arn
+      },
       {
         Effect = "Allow"
         Action = [
@@ -49,6 +57,23 @@ resource "aws_iam_role_policy" "lambda_auto_heal_policy" {
 }
 
 
+# Last reboot time per instance, used to enforce the cooldown between reboots
+resource "aws_dynamodb_table" "auto_heal_cooldown" {
+  name         = "auto-remediation-cooldown"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "instance_id"
+
+  attribute {
+    name = "instance_id"
+    type = "S"
+  }
+
+  tags = {
+    Name = "AutoHealCooldown"
+  }
+}
+
+
 resource "aws_lambda_function" "auto_heal" {
   filename         = "lambda/auto_remediation.zip"
   function_name    = "auto_heal_ec2"
@@ -56,12 +81,14 @@ resource "aws_lambda_function" "auto_heal" {
   handler         = "auto_remediation.lambda_handler"
   source_code_hash = filebase64sha256("lambda/auto_remediation.zip")
   runtime         = "python3.11"
-  timeout         = 60
+  architectures   = ["arm64"]
+  timeout         = 900 # Worst case with AWS API retries is about 770s (see CLIENT_CONFIG)
   description      = "Auto-heal EC2 instances when CloudWatch alarms trigger"
 
   environment {
     variables = {
-      SNS_TOPIC_ARN = aws_sns_topic.alerts.arn
+      SNS_TOPIC_ARN  = aws_sns_topic.alerts.arn
+      COOLDOWN_TABLE = aws_dynamodb_table.auto_heal_cooldown.name
     }
   }
 
@@ -1,100 +1,272 @@
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
 import json
 import os
 import logging
-from datetime import datetime, timezone, timedelta
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Use orjson to read alarm messages if it's bundled with the Lambda (much faster),
+# otherwise fall back to the standard json module
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
 
 # Set up logging so we can see what's happening
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Shared settings for all AWS clients:
+# - keep connections open between warm invocations (saves a TLS handshake)
+# - enough pooled connections for every worker thread
+# - up to 8 retries with jittered backoff when AWS throttles us, so reboots ride
+#   out an alarm storm (adaptive mode also rate-limits on the client side, so
+#   we don't add our own retry loops on top)
+# - short connect/read timeouts, so each attempt of a hung call gives up
+#   after at most 7 seconds (2s connect + 5s read)
+#
+# Worst case for a call that keeps hanging: botocore makes 9 attempts
+# (1 + 8 retries) = 63s, plus backoff of at most 1+2+4+8+16+20+20+20 = 91s,
+# so about 154s. An alarm makes up to 5 calls one after another (describe,
+# lease, reboot, release, notify), which is about 770s. The Lambda timeout in
+# auto_healing.tf is 900s to fit that.
+CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    max_pool_connections=20,
+    retries={'max_attempts': 8, 'mode': 'adaptive'},
+    connect_timeout=2,
+    read_timeout=5
+)
+
 # Create connections to AWS services
-ec2 = boto3.client('ec2')      # For working with EC2 instances
-sns = boto3.client('sns')       # For sending notifications
-ssm = boto3.client('ssm')       # For storing reboot history
+ec2 = boto3.client('ec2', config=CLIENT_CONFIG)  # For working with EC2 instances
+
+# These are only needed when we actually reboot, so create them on first use
+# to keep cold starts fast. The first use happens inside the worker threads, and
+# creating clients on the default session isn't thread-safe, so only one thread
+# may build a client and everyone else reuses it.
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+def get_client(service_name):
+    """
+    Return the shared client for an AWS service, creating it the first time.
+    """
+    client = _CLIENTS.get(service_name)
+    if client is None:
+        with _CLIENTS_LOCK:
+            # Another thread may have created it while we waited
+            client = _CLIENTS.get(service_name)
+            if client is None:
+                client = boto3.client(service_name, config=CLIENT_CONFIG)
+                _CLIENTS[service_name] = client
+    return client
+
+def sns_client():
+    # For sending notifications
+    return get_client('sns')
+
+def ddb_client():
+    # For storing reboot history
+    return get_client('dynamodb')
+
+# Most SNS batches are small, so this many threads is plenty. Threads (rather
+# than asyncio with aioboto3) keep us on the boto3 that ships with the Lambda
+# runtime; at this batch size the per-thread overhead doesn't matter.
+MAX_WORKERS = 10
 
 # Get settings from environment variables (set in Lambda)
 try:
     COOLDOWN_MINUTES = int(os.environ.get('COOLDOWN_MINUTES', '15'))
 except:
     COOLDOWN_MINUTES = 15  # Default to 15 minutes if setting is wrong
+COOLDOWN_SECONDS = COOLDOWN_MINUTES * 60
 
 SNS_TOPIC_ARN = os.environ.get('SNS_TOPIC_ARN')  # Where to send notifications
+COOLDOWN_TABLE = os.environ.get('COOLDOWN_TABLE', 'auto-remediation-cooldown')  # Reboot history
 
-def get_last_reboot_time(instance_id):
+# Response bodies never change, so serialize them once
+NO_RECORDS_BODY = json.dumps('No SNS records found')
+COMPLETE_BODY = json.dumps('Processing complete')
+
+# Notification templates, built once when the container starts
+SUBJECT_TEMPLATE = "[Auto-Heal] {status} - {instance_name} ({instance_id})"
+BODY_TEMPLATE = """
+Auto-healing Action: {status}
+""" + '=' * 50 + """
+
+INSTANCE:
+• Instance ID: {instance_id}
+• Instance Name: {instance_name}
+
+ALARM:
+• Alarm Name: {alarm_name}
+• Reason: {reason}
+• Time: {state_change_time}
+
+ACTION: EC2 instance reboot was {action}
+{next_step}
+"""
+
+# Remember reboot times we have seen. Lambda reuses the container between warm
+# invocations, so this saves a DynamoDB call when the same instance alarms again.
+# DynamoDB is still the source of truth after a cold start.
+_COOLDOWN_CACHE = {}  # instance_id -> Unix time (seconds) of last reboot
+_COOLDOWN_CACHE_LOCK = threading.Lock()  # Worker threads write to it
+
+# Instance details are also kept for a short time, so a burst of alarms for the
+# same instance (e.g. CPU and memory) across invocations needs only one lookup
+INSTANCE_CACHE_SECONDS = 30
+_INSTANCE_CACHE = {}  # instance_id -> (expiry time, instance details)
+
+def remember_reboot_time(instance_id, reboot_time, now):
+    """
+    Save a reboot time in the in-memory cache, dropping entries whose cooldown
+    has already ended so a long-lived container doesn't keep growing it.
     """
-    Check when this instance was last rebooted by our automation.
-    Returns None if never rebooted or if we can't find the info.
+    with _COOLDOWN_CACHE_LOCK:
+        for cached_id, cached_time in list(_COOLDOWN_CACHE.items()):
+            if now - cached_time >= COOLDOWN_SECONDS:
+                del _COOLDOWN_CACHE[cached_id]
+        _COOLDOWN_CACHE[instance_id] = reboot_time
+
+def log_cooldown(instance_id, last_reboot, now):
     """
-    # SSM Parameter path where we store reboot times
-    param_name = f"/auto-remediation/last-reboot/{instance_id}"
+    Explain why we are not rebooting this instance.
+    """
+    minutes_since = (now - last_reboot) // 60
+    logger.warning(
+        f"Instance {instance_id} was rebooted {minutes_since} minutes ago. "
+        f"Waiting {COOLDOWN_MINUTES} minutes between reboots."
+    )
+
+def try_acquire_reboot_lease(instance_id):
+    """
+    Claim the right to reboot this instance.
+    Returns the lease (reboot time, lease ID) if it's OK to reboot, or None if
+    the instance was rebooted less than COOLDOWN_MINUTES ago.
+    
+    The check and the update happen in one conditional DynamoDB write, so two
+    invocations can never both get the lease for the same instance.
+    """
+    now = int(time.time())
+    
+    # Unique ID for this attempt, so we can recognise our own write if boto3
+    # retries the call after the first try already succeeded
+    lease_id = uuid.uuid4().hex
+    lease = (now, lease_id)
+    
+    # If this container did the last reboot we already know the answer
+    cached_time = _COOLDOWN_CACHE.get(instance_id)
+    if cached_time is not None and now - cached_time < COOLDOWN_SECONDS:
+        log_cooldown(instance_id, cached_time, now)
+        return None
     
     try:
-        # Try to get the stored reboot time
-        response = ssm.get_parameter(Name=param_name)
-        timestamp_str = response['Parameter']['Value']
-        
-        # Convert the stored text into a datetime object
-        reboot_time = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-        
-        # Make sure it has timezone info (assume UTC if not)
-        if reboot_time.tzinfo is None:
-            reboot_time = reboot_time.replace(tzinfo=timezone.utc)
+        # Only write the new time if the last reboot is older than the cooldown
+        ddb_client().update_item(
+            TableName=COOLDOWN_TABLE,
+            Key={'instance_id': {'S': instance_id}},
+            UpdateExpression='SET last_reboot = :now, lease_id = :lease',
+            ConditionExpression='attribute_not_exists(last_reboot) OR last_reboot < :cutoff',
+            ExpressionAttributeValues={
+                ':now': {'N': str(now)},
+                ':lease': {'S': lease_id},
+                ':cutoff': {'N': str(now - COOLDOWN_SECONDS)}
+            },
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            old_item = e.response.get('Item', {})
             
-        return reboot_time
+            # Our first try went through but the response was lost - the lease is ours
+            if old_item.get('lease_id', {}).get('S') == lease_id:
+                remember_reboot_time(instance_id, now, now)
+                logger.info(f"Updated last reboot time for instance {instance_id}")
+                return lease
+            
+            # Another reboot happened recently - remember it for next time
+            if 'last_reboot' in old_item:
+                last_reboot = int(old_item['last_reboot']['N'])
+                remember_reboot_time(instance_id, last_reboot, now)
+                log_cooldown(instance_id, last_reboot, now)
+            else:
+                logger.warning(
+                    f"Instance {instance_id} was rebooted recently. "
+                    f"Waiting {COOLDOWN_MINUTES} minutes between reboots."
+                )
+            return None
         
-    except ssm.exceptions.ParameterNotFound:
-        # No reboot history found - this is normal for first time
-        return None
+        # Something else went wrong, but we can continue. The write may still
+        # have gone through, so hand back the lease in case we need to release it
+        logger.warning(f"Could not check reboot history for {instance_id}: {str(e)}")
+        return lease
     except Exception as e:
-        # Something else went wrong, but we can continue
-        logger.warning(f"Could not read reboot time for {instance_id}: {str(e)}")
-        return None
+        logger.warning(f"Could not check reboot history for {instance_id}: {str(e)}")
+        return lease
+    
+    # Keep a copy in memory for warm invocations
+    remember_reboot_time(instance_id, now, now)
+    logger.info(f"Updated last reboot time for instance {instance_id}")
+    return lease
 
-def set_last_reboot_time(instance_id):
+def release_reboot_lease(instance_id, lease):
     """
-    Store the current time as the last reboot time for this instance.
+    Give the lease back after a failed reboot, so the next alarm can try again.
+    Only deletes the record if it still holds our lease - if we never got the
+    lease (or someone else has it now) their cooldown is left alone.
     """
-    param_name = f"/auto-remediation/last-reboot/{instance_id}"
+    reboot_time, lease_id = lease
+    with _COOLDOWN_CACHE_LOCK:
+        if _COOLDOWN_CACHE.get(instance_id) == reboot_time:
+            del _COOLDOWN_CACHE[instance_id]
     
     try:
-        # Save current time to SSM Parameter Store
-        current_time = datetime.now(timezone.utc).isoformat()
-        ssm.put_parameter(
-            Name=param_name,
-            Value=current_time,
-            Type='String',
-            Overwrite=True  # Update if it already exists
+        ddb_client().delete_item(
+            TableName=COOLDOWN_TABLE,
+            Key={'instance_id': {'S': instance_id}},
+            ConditionExpression='last_reboot = :now AND lease_id = :lease',
+            ExpressionAttributeValues={
+                ':now': {'N': str(reboot_time)},
+                ':lease': {'S': lease_id}
+            }
         )
-        logger.info(f"Updated last reboot time for instance {instance_id}")
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            # Not our lease - nothing to give back
+            return
+        # Worst case the instance waits out the cooldown
+        logger.warning(f"Could not clear reboot time for {instance_id}: {str(e)}")
     except Exception as e:
-        # Log error but don't stop the reboot
-        logger.warning(f"Could not save reboot time for {instance_id}: {str(e)}")
+        # Worst case the instance waits out the cooldown
+        logger.warning(f"Could not clear reboot time for {instance_id}: {str(e)}")
 
-def is_in_cooldown(instance_id):
+def parse_instance(instance):
     """
-    Check if we should wait before rebooting this instance again.
-    Returns True if we should NOT reboot, False if it's OK to reboot.
+    Pull the fields we care about out of a describe_instances entry.
     """
-    last_reboot = get_last_reboot_time(instance_id)
-    
-    # If never rebooted before, definitely not in cooldown
-    if last_reboot is None:
-        return False
-    
-    # Calculate how long since last reboot
-    time_since_reboot = datetime.now(timezone.utc) - last_reboot
-    minutes_since = time_since_reboot.total_seconds() / 60
-    
-    # Check if we're still in the cooldown period
-    if minutes_since < COOLDOWN_MINUTES:
-        logger.warning(
-            f"Instance {instance_id} was rebooted {int(minutes_since)} minutes ago. "
-            f"Waiting {COOLDOWN_MINUTES} minutes between reboots."
-        )
-        return True
+    # Get the Name tag, or 'Unknown' if not set (the other tags aren't used)
+    name = next((tag['Value'] for tag in instance.get('Tags', ()) if tag['Key'] == 'Name'), 'Unknown')
     
-    return False
+    # Return the important information
+    return {
+        'state': instance['State']['Name'],
+        'name': name,
+        'type': instance['InstanceType'],
+        'launch_time': instance['LaunchTime']
+    }
+
+def is_bad_instance_id(error):
+    """
+    Check if an EC2 error means an instance ID doesn't exist or is malformed
+    (InvalidInstanceID.NotFound, InvalidInstanceID.Malformed, ...).
+    """
+    return error.response['Error']['Code'].startswith('InvalidInstanceID.')
 
 def get_instance_details(instance_id):
     """
@@ -111,47 +283,103 @@ def get_instance_details(instance_id):
             logger.error(f"Instance {instance_id} not found")
             return None
             
-        instance = reservations[0]['Instances'][0]
-        
-        # Get tags (like Name) as a simple dictionary
-        tags = {}
-        for tag in instance.get('Tags', []):
-            tags[tag['Key']] = tag['Value']
-        
-        # Return the important information
-        return {
-            'state': instance['State']['Name'],
-            'tags': tags,
-            'name': tags.get('Name', 'Unknown'),  # Get Name tag, or 'Unknown' if not set
-            'type': instance['InstanceType'],
-            'launch_time': instance['LaunchTime']
-        }
+        return parse_instance(reservations[0]['Instances'][0])
         
-    except Exception as e:
-        # Check if instance doesn't exist
-        if 'InvalidInstanceID.NotFound' in str(e):
-            logger.error(f"Instance {instance_id} does not exist")
+    except ClientError as e:
+        # Check if instance doesn't exist (or the ID isn't valid at all)
+        if is_bad_instance_id(e):
+            logger.error(f"Instance {instance_id} does not exist or has an invalid ID")
             return None
         else:
             # Some other error occurred
             logger.error(f"Error getting instance info: {str(e)}")
             raise
+    except Exception as e:
+        logger.error(f"Error getting instance info: {str(e)}")
+        raise
+
+def fetch_instances(instance_ids):
+    """
+    Get information about several EC2 instances with one API call.
+    Returns a dictionary of instance ID -> instance details.
+    Instances that don't exist are left out.
+    """
+    try:
+        # One call for every instance in the batch (SNS batches are small, no paging needed)
+        response = ec2.describe_instances(InstanceIds=list(instance_ids))
+    except ClientError as e:
+        if is_bad_instance_id(e):
+            # One bad ID fails the whole call - look them up one at a time instead
+            logger.warning("Some instance IDs were not found or invalid - looking them up one by one")
+            details = {}
+            for instance_id in instance_ids:
+                instance_details = get_instance_details(instance_id)
+                if instance_details:
+                    details[instance_id] = instance_details
+            return details
+        logger.error(f"Error getting instance info: {str(e)}")
+        raise
+    except Exception as e:
+        logger.error(f"Error getting instance info: {str(e)}")
+        raise
+    
+    details = {}
+    for reservation in response.get('Reservations', []):
+        for instance in reservation.get('Instances', []):
+            details[instance['InstanceId']] = parse_instance(instance)
+    return details
+
+def describe_instances_bulk(instance_ids):
+    """
+    Get information about several EC2 instances, using recent lookups from
+    this container when we have them and one API call for the rest.
+    Returns a dictionary of instance ID -> instance details.
+    Instances that don't exist are left out.
+    """
+    details = {}
+    missing = []
+    now = time.monotonic()
+    
+    for instance_id in instance_ids:
+        cached = _INSTANCE_CACHE.get(instance_id)
+        if cached is not None and cached[0] > now:
+            details[instance_id] = cached[1]
+        else:
+            missing.append(instance_id)
+    
+    if missing:
+        fetched = fetch_instances(missing)
+        
+        # Drop expired lookups so a long-lived container doesn't keep growing the cache
+        for cached_id, cached in list(_INSTANCE_CACHE.items()):
+            if cached[0] <= now:
+                del _INSTANCE_CACHE[cached_id]
+        
+        expires = now + INSTANCE_CACHE_SECONDS
+        for instance_id, instance_details in fetched.items():
+            _INSTANCE_CACHE[instance_id] = (expires, instance_details)
+        details.update(fetched)
+    
+    return details
 
 def reboot_instance(instance_id):
     """
     Send a reboot command to an EC2 instance.
-    Returns True if reboot command was sent, False if it failed.
+    Returns True if reboot command was sent, False if it failed, or None if
+    the instance turned out not to be running (e.g. our cached state was stale).
     """
     try:
         # Send the reboot command
         ec2.reboot_instances(InstanceIds=[instance_id])
         logger.info(f"Reboot command sent to instance {instance_id}")
-        
-        # Record when we did this reboot
-        set_last_reboot_time(instance_id)
-        
         return True
         
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'IncorrectInstanceState':
+            logger.info(f"Instance {instance_id} is no longer running - only running instances can be rebooted")
+            return None
+        logger.error(f"Failed to reboot {instance_id}: {str(e)}")
+        return False
     except Exception as e:
         logger.error(f"Failed to reboot {instance_id}: {str(e)}")
         return False
@@ -166,31 +394,23 @@ def send_notification(instance_id, instance_name, alarm_name, reason, state_chan
         logger.info("No SNS topic configured - skipping notification")
         return
     
-    # Create subject line (keep it short)
+    # Fill in the notification templates
     status = "SUCCESS" if success else "FAILED"
-    subject = f"[Auto-Heal] {status} - {instance_name} ({instance_id})"
-    
-    # Create the message body
-    body = f"""
-Auto-healing Action: {status}
-{'='*50}
-
-INSTANCE:
-• Instance ID: {instance_id}
-• Instance Name: {instance_name}
-
-ALARM:
-• Alarm Name: {alarm_name}
-• Reason: {reason}
-• Time: {state_change_time}
-
-ACTION: EC2 instance reboot was {'initiated' if success else 'FAILED'}
-{f'• Expected recovery: 2-5 minutes' if success else '• Manual intervention may be required'}
-"""
+    subject = SUBJECT_TEMPLATE.format(status=status, instance_name=instance_name, instance_id=instance_id)
+    body = BODY_TEMPLATE.format(
+        status=status,
+        instance_id=instance_id,
+        instance_name=instance_name,
+        alarm_name=alarm_name,
+        reason=reason,
+        state_change_time=state_change_time,
+        action='initiated' if success else 'FAILED',
+        next_step='• Expected recovery: 2-5 minutes' if success else '• Manual intervention may be required'
+    )
     
     try:
         # Send the notification
-        sns.publish(
+        sns_client().publish(
             TopicArn=SNS_TOPIC_ARN,
             Subject=subject[:100],  # SNS subjects have a 100 character limit
             Message=body
@@ -199,6 +419,119 @@ ACTION: EC2 instance reboot was {'initiated' if success else 'FAILED'}
     except Exception as e:
         logger.error(f"Failed to send notification: {str(e)}")
 
+def parse_record(record):
+    """
+    Read the CloudWatch alarm out of one SNS record.
+    Returns a dictionary with the alarm details. 'instance_id' is None
+    if the alarm has no InstanceId dimension.
+    """
+    # Parse the SNS message
+    sns_message = record['Sns']['Message']
+    message = loads(sns_message)
+    
+    # Get alarm information
+    alarm = {
+        'alarm_name': message.get('AlarmName', 'Unknown'),
+        'new_state': message.get('NewStateValue'),
+        'reason': message.get('NewStateReason', 'No reason provided'),
+        'state_change_time': message.get('StateChangeTime', 'Unknown'),
+        'instance_id': None
+    }
+    
+    logger.info(f"Alarm: {alarm['alarm_name']}")
+    logger.info(f"State: {alarm['new_state']}")
+    logger.info(f"Reason: {alarm['reason']}")
+    
+    # Find the instance ID from the alarm dimensions (keys may be 'name' or 'Name')
+    dimensions = {
+        (dim.get('name') or dim.get('Name')): (dim.get('value') or dim.get('Value'))
+        for dim in message.get('Trigger', {}).get('Dimensions', ())
+    }
+    alarm['instance_id'] = dimensions.get('InstanceId')
+    
+    return alarm
+
+def process_record(alarm, instance_info):
+    """
+    Decide whether to reboot the instance behind one alarm, and do it.
+    alarm: Alarm details from parse_record
+    instance_info: Instance details from describe_instances_bulk
+    """
+    alarm_name = alarm['alarm_name']
+    new_state = alarm['new_state']
+    instance_id = alarm['instance_id']
+    
+    # Only act when alarm goes into ALARM state (lambda_handler already filters
+    # these out, but check again in case we're called some other way)
+    if new_state != 'ALARM':
+        logger.info(f"State is {new_state} - no action needed")
+        return
+    
+    if not instance_id:
+        logger.error(f"Could not find Instance ID in alarm: {alarm_name}")
+        return
+    
+    logger.info(f"Instance ID: {instance_id}")
+    
+    # Look up the instance details we fetched for the whole batch
+    instance_details = instance_info.get(instance_id)
+    if not instance_details:
+        logger.error(f"Could not get details for instance {instance_id}")
+        return
+    
+    # Check if instance is running
+    if instance_details['state'] != 'running':
+        logger.info(f"Instance is {instance_details['state']} - only running instances can be rebooted")
+        return
+    
+    # Check cooldown period (this also records the reboot time)
+    lease = try_acquire_reboot_lease(instance_id)
+    if lease is None:
+        logger.info(f"Instance {instance_id} is in cooldown - skipping reboot")
+        return
+    
+    # Reboot the instance
+    instance_name = instance_details['name']
+    logger.info(f"Attempting to reboot {instance_name} ({instance_id})")
+    
+    reboot_successful = reboot_instance(instance_id)
+    if not reboot_successful:
+        release_reboot_lease(instance_id, lease)
+    
+    # The instance stopped after we looked it up - same as the running check
+    # above, so there's nothing to report. Forget the stale details too.
+    if reboot_successful is None:
+        _INSTANCE_CACHE.pop(instance_id, None)
+        return
+    
+    # Send notification about what we did
+    send_notification(
+        instance_id,
+        instance_name,
+        alarm_name,
+        alarm['reason'],
+        alarm['state_change_time'],
+        reboot_successful
+    )
+    
+    if reboot_successful:
+        logger.info(f"Successfully initiated reboot for {instance_id}")
+    else:
+        logger.error(f"Failed to reboot {instance_id}")
+
+def process_alarm_group(alarms, instance_info):
+    """
+    Handle a list of alarms for the same instance, one at a time.
+    Errors are logged per alarm so one bad record doesn't stop the rest.
+    """
+    for alarm in alarms:
+        try:
+            process_record(alarm, instance_info)
+        except Exception as e:
+            # Catch any unexpected errors so we can log them
+            logger.error(f"Error processing record: {str(e)}")
+            logger.exception("Full error details:")
+
 def lambda_handler(event, context):
     """
     Main function that AWS Lambda calls when this script runs.
@@ -213,94 +546,74 @@ def lambda_handler(event, context):
         logger.error("No SNS records found in event")
         return {
             'statusCode': 400,
-            'body': json.dumps('No SNS records found')
+            'body': NO_RECORDS_BODY
         }
     
-    # Process each record (usually just one)
+    # Pass 1: read every alarm and keep only the ones we need to act on
+    alarms = []
+    instance_ids = []
     for record in event['Records']:
         try:
-            # Step 1: Parse the SNS message
-            sns_message = record['Sns']['Message']
-            message = json.loads(sns_message)
-            
-            # Step 2: Get alarm information
-            alarm_name = message.get('AlarmName', 'Unknown')
-            new_state = message.get('NewStateValue')
-            reason = message.get('NewStateReason', 'No reason provided')
-            state_change_time = message.get('StateChangeTime', 'Unknown')
-            
-            logger.info(f"Alarm: {alarm_name}")
-            logger.info(f"State: {new_state}")
-            logger.info(f"Reason: {reason}")
-            
-            # Step 3: Only act when alarm goes into ALARM state
-            if new_state != 'ALARM':
-                logger.info(f"State is {new_state} - no action needed")
-                continue
-            
-            # Step 4: Find the instance ID from the alarm
-            instance_id = None
-            trigger = message.get('Trigger', {})
-            dimensions = trigger.get('Dimensions', [])
-            
-            for dim in dimensions:
-                # Look for the InstanceId dimension
-                dim_name = dim.get('name') or dim.get('Name')
-                if dim_name == 'InstanceId':
-                    instance_id = dim.get('value') or dim.get('Value')
-                    break
-            
-            if not instance_id:
-                logger.error(f"Could not find Instance ID in alarm: {alarm_name}")
-                continue
-            
-            logger.info(f"Instance ID: {instance_id}")
-            
-            # Step 5: Check cooldown period
-            if is_in_cooldown(instance_id):
-                logger.info(f"Instance {instance_id} is in cooldown - skipping reboot")
-                continue
-            
-            # Step 6: Get instance details
-            instance_details = get_instance_details(instance_id)
-            if not instance_details:
-                logger.error(f"Could not get details for instance {instance_id}")
-                continue
-            
-            # Step 7: Check if instance is running
-            if instance_details['state'] != 'running':
-                logger.info(f"Instance is {instance_details['state']} - only running instances can be rebooted")
-                continue
-            
-            # Step 8: Reboot the instance
-            instance_name = instance_details['name']
-            logger.info(f"Attempting to reboot {instance_name} ({instance_id})")
-            
-            reboot_successful = reboot_instance(instance_id)
-            
-            # Step 9: Send notification about what we did
-            send_notification(
-                instance_id,
-                instance_name,
-                alarm_name,
-                reason,
-                state_change_time,
-                reboot_successful
-            )
-            
-            if reboot_successful:
-                logger.info(f"Successfully initiated reboot for {instance_id}")
-            else:
-                logger.error(f"Failed to reboot {instance_id}")
-                
+            alarm = parse_record(record)
         except Exception as e:
-            # Catch any unexpected errors so we can log them
             logger.error(f"Error processing record: {str(e)}")
             logger.exception("Full error details:")
+            continue
+        
+        # Only act when alarm goes into ALARM state (OK and INSUFFICIENT_DATA need no AWS calls)
+        if alarm['new_state'] != 'ALARM':
+            logger.info(f"State is {alarm['new_state']} - no action needed")
+            continue
+        
+        instance_id = alarm['instance_id']
+        if not instance_id:
+            logger.error(f"Could not find Instance ID in alarm: {alarm['alarm_name']}")
+            continue
+        
+        alarms.append(alarm)
+        if instance_id not in instance_ids:
+            instance_ids.append(instance_id)
+    
+    # Nothing to reboot - finish without calling AWS
+    if not alarms:
+        logger.info("No alarms need action")
+        logger.info("Auto-remediation function completed")
+        return {
+            'statusCode': 200,
+            'body': COMPLETE_BODY
+        }
+    
+    # Pass 2: look up all instances at once, then handle each alarm
+    try:
+        instance_info = describe_instances_bulk(instance_ids)
+    except Exception as e:
+        logger.error(f"Error getting instance details: {str(e)}")
+        logger.exception("Full error details:")
+        instance_info = {}
+    
+    # Alarms for the same instance must run one after another, otherwise both
+    # could pass the cooldown check and reboot the instance twice
+    groups = {}
+    for alarm in alarms:
+        groups.setdefault(alarm['instance_id'], []).append(alarm)
+    
+    # Handle the instances in parallel - the work is all waiting on AWS API calls
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(groups))) as executor:
+        futures = [
+            executor.submit(process_alarm_group, group, instance_info)
+            for group in groups.values()
+        ]
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                # Catch any unexpected errors so we can log them
+                logger.error(f"Error processing record: {str(e)}")
+                logger.exception("Full error details:")
     
     logger.info("Auto-remediation function completed")
     
     return {
         'statusCode': 200,
-        'body': json.dumps('Processing complete')
-    }
\ No newline at end of file
+        'body': COMPLETE_BODY
+    }